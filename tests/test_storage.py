@@ -0,0 +1,266 @@
+"""
+Тесты хранилища колоды: журнал, уплотнение, отметка id и отложенная запись.
+
+Запуск из корня репозитория:
+
+    python -m pytest tests
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools'))
+from headless import import_app  # noqa: E402
+
+main = import_app(prefix='cards-tests-')
+
+
+def _card(front, back='ответ', **fields):
+    return dict(fields, front=front, back=back)
+
+
+class StorageTestCase(unittest.TestCase):
+    """Каждый тест работает в своем каталоге; запись на диск - только по flush()"""
+    backend_name = 'json'
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix='cards-storage-')
+        self._write_behind_delay = main.WRITE_BEHIND_DELAY
+        # Таймер сброса не должен срабатывать посреди теста
+        main.WRITE_BEHIND_DELAY = 60
+        self.backends = []
+
+    def tearDown(self):
+        main.WRITE_BEHIND_DELAY = self._write_behind_delay
+        for backend in self.backends:
+            thread = getattr(backend, '_binary_thread', None)
+            if thread is not None:
+                thread.join()
+            conn = getattr(backend, '_conn', None)
+            if conn is not None:
+                conn.close()
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    @property
+    def path(self):
+        return os.path.join(self.dir, 'cards.db' if self.backend_name == 'sqlite' else 'cards.json')
+
+    def open_repository(self):
+        """Новый репозиторий над теми же файлами - как после перезапуска приложения"""
+        if self.backend_name == 'sqlite':
+            backend = main.SqliteBackend(self.path, legacy_json_path=os.path.join(self.dir, 'legacy.json'))
+        else:
+            backend = main.JsonJournalBackend(self.path)
+        self.backends.append(backend)
+        repository = main.CardRepository(backend)
+        self.addCleanup(repository._cancel_flush)
+        return repository
+
+    def add(self, repository, front):
+        card = _card(front)
+        self.assertTrue(repository.add(card))
+        return card['id']
+
+    def deck(self):
+        return [(card['id'], card['front']) for card in self.open_repository().cards()]
+
+
+class CardIdTests(StorageTestCase):
+    def test_restart_after_delete_does_not_reuse_id(self):
+        repository = self.open_repository()
+        repository.replace_all([_card('a'), _card('b')])
+        last_id = self.add(repository, 'c')
+        repository.flush()
+        repository.delete(last_id)
+        repository.flush()
+
+        repository = self.open_repository()
+        self.assertGreater(self.add(repository, 'd'), last_id)
+
+    def test_add_and_delete_in_one_flush_window(self):
+        repository = self.open_repository()
+        repository.replace_all([_card('a')])
+        temporary_id = self.add(repository, 'b')
+        repository.delete(temporary_id)
+        repository.flush()
+
+        self.assertEqual(self.deck(), [(1, 'a')])
+        repository = self.open_repository()
+        self.assertGreater(self.add(repository, 'c'), temporary_id)
+
+    def test_compaction_keeps_id_high_water_mark(self):
+        repository = self.open_repository()
+        repository.replace_all([_card('a')])
+        last_id = self.add(repository, 'b')
+        repository.flush()
+        repository.delete(last_id)
+        repository.flush()
+        repository.compact()
+
+        repository = self.open_repository()
+        self.assertGreater(self.add(repository, 'c'), last_id)
+
+    def test_replace_all_assigns_ids_above_previous_deck(self):
+        repository = self.open_repository()
+        repository.replace_all([_card('a'), _card('b'), _card('c')])
+
+        repository = self.open_repository()
+        repository.replace_all([_card('x'), _card('y', id=1)])
+        self.assertEqual(sorted(self.deck()), [(1, 'y'), (4, 'x')])
+
+
+class SqliteCardIdTests(CardIdTests):
+    backend_name = 'sqlite'
+
+
+class JournalTests(StorageTestCase):
+    def write_snapshot(self, cards):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(cards, f)
+
+    def append_journal(self, text):
+        with open(self.path + '.journal', 'a', encoding='utf-8') as f:
+            f.write(text)
+
+    def test_journal_replay(self):
+        repository = self.open_repository()
+        repository.replace_all([_card('a'), _card('b'), _card('c')])
+        repository.update(2, _card('b2'))
+        repository.delete(1)
+        new_id = self.add(repository, 'd')
+        repository.flush()
+
+        self.assertTrue(os.path.exists(self.path + '.journal'))
+        self.assertEqual(self.deck(), [(2, 'b2'), (3, 'c'), (new_id, 'd')])
+
+    def test_legacy_deck_without_ids(self):
+        self.write_snapshot([_card('a'), _card('b'), _card('c')])
+        # Журнал старого формата адресует карточки по позиции
+        self.append_journal(json.dumps({'op': 'update', 'index': 0, 'card': _card('a2')}) + '\n')
+        self.append_journal(json.dumps({'op': 'delete', 'index': 1}) + '\n')
+
+        self.assertEqual(self.deck(), [(1, 'a2'), (3, 'c')])
+        # Выданные id сохранены и при следующем запуске не меняются
+        self.assertEqual(self.deck(), [(1, 'a2'), (3, 'c')])
+        with open(self.path, encoding='utf-8') as f:
+            self.assertEqual([card['id'] for card in json.load(f)], [1, 3])
+
+    def test_torn_journal_line(self):
+        repository = self.open_repository()
+        repository.replace_all([_card('a')])
+        self.add(repository, 'b')
+        repository.flush()
+        # Сбой посреди записи оставил недописанную строку
+        self.append_journal('{"op": "add", "card": {"fro')
+
+        repository = self.open_repository()
+        self.assertEqual([card['front'] for card in repository.cards()], ['a', 'b'])
+        new_id = self.add(repository, 'c')
+        repository.flush()
+        self.assertEqual(self.deck(), [(1, 'a'), (2, 'b'), (new_id, 'c')])
+
+    def test_compaction_folds_journal_into_snapshot(self):
+        repository = self.open_repository()
+        repository.replace_all([_card('a'), _card('b')])
+        repository.update(1, _card('a2'))
+        self.add(repository, 'c')
+        repository.flush()
+        expected = self.deck()
+
+        repository.compact()
+        self.assertFalse(os.path.exists(self.path + '.journal'))
+        self.assertTrue(repository.is_fresh())
+        self.assertEqual(self.deck(), expected)
+
+    def test_compaction_without_cache_rereads_snapshot(self):
+        repository = self.open_repository()
+        repository.replace_all([_card('a'), _card('b')])
+        repository.delete(1)
+        repository.flush()
+
+        self.open_repository().compact()
+        self.assertEqual(self.deck(), [(2, 'b')])
+
+    def test_compaction_racing_new_mutations(self):
+        repository = self.open_repository()
+        repository.replace_all([_card(f'q{i}') for i in range(20)])
+        repository.update(1, _card('q0-edited'))
+        repository.flush()
+
+        write_json_file = main._write_json_file
+
+        def write_and_mutate(path, data, indent=2):
+            # Новый снимок пишется без блокировки: в это время колода продолжает меняться
+            written = write_json_file(path, data, indent)
+            if path.endswith('.compact.tmp'):
+                mutator = threading.Thread(target=self.mutate_during_compaction, args=(repository,))
+                mutator.start()
+                mutator.join()
+            return written
+
+        main._write_json_file = write_and_mutate
+        try:
+            repository.compact()
+        finally:
+            main._write_json_file = write_json_file
+
+        expected = [(card['id'], card['front']) for card in repository.cards()]
+        self.assertIn((1, 'q0-edited'), expected)
+        self.assertIn((3, 'q2-edited'), expected)
+        self.assertNotIn(2, [card_id for card_id, _ in expected])
+        self.assertIn((21, 'new'), expected)
+        self.assertFalse(os.path.exists(self.path + '.journal.compacting'))
+        self.assertEqual(self.deck(), expected)
+
+    def mutate_during_compaction(self, repository):
+        self.assertTrue(os.path.exists(self.path + '.journal.compacting'))
+        repository.delete(2)
+        repository.update(3, _card('q2-edited'))
+        self.add(repository, 'new')
+        repository.flush()
+
+
+class WriteBehindBufferTests(unittest.TestCase):
+    def setUp(self):
+        self.buffer = main.WriteBehindBuffer()
+
+    def test_update_after_add_stays_add(self):
+        self.buffer.add({'op': 'add', 'card': _card('a', id=1)})
+        self.buffer.add({'op': 'update', 'id': 1, 'card': _card('a2', id=1)})
+        self.assertEqual(self.buffer.drain(), [{'op': 'add', 'card': _card('a2', id=1)}])
+        self.assertEqual(self.buffer.merged, 1)
+
+    def test_delete_cancels_add(self):
+        self.buffer.add({'op': 'add', 'card': _card('a', id=1)})
+        self.buffer.add({'op': 'delete', 'id': 1})
+        self.assertEqual(self.buffer.drain(), [])
+
+    def test_last_update_wins(self):
+        self.buffer.add({'op': 'update', 'id': 1, 'card': _card('a2', id=1)})
+        self.buffer.add({'op': 'update', 'id': 1, 'card': _card('a3', id=1)})
+        self.buffer.add({'op': 'update', 'id': 2, 'card': _card('b2', id=2)})
+        self.assertEqual([record['card']['front'] for record in self.buffer.drain()], ['a3', 'b2'])
+
+    def test_delete_replaces_update(self):
+        self.buffer.add({'op': 'update', 'id': 1, 'card': _card('a2', id=1)})
+        self.buffer.add({'op': 'delete', 'id': 1})
+        self.assertEqual(self.buffer.drain(), [{'op': 'delete', 'id': 1}])
+
+    def test_restore_keeps_failed_records_before_newer(self):
+        self.buffer.add({'op': 'update', 'id': 1, 'card': _card('a2', id=1)})
+        failed = self.buffer.drain()
+        self.buffer.add({'op': 'update', 'id': 1, 'card': _card('a3', id=1)})
+        self.buffer.add({'op': 'add', 'card': _card('b', id=2)})
+        self.buffer.restore(failed)
+        self.assertEqual(self.buffer.drain(), [
+            {'op': 'update', 'id': 1, 'card': _card('a3', id=1)},
+            {'op': 'add', 'card': _card('b', id=2)},
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+"""
+Набор бенчмарков горячих путей приложения.
+
+Запускается без экрана (SDL offscreen) во временном каталоге, чтобы не трогать
+настоящую колоду, и пишет результаты в JSON для сравнения между коммитами:
+
+    python tools/benchmark.py --sizes 100,1000,10000 --output benchmark_results.json
+"""
+import argparse
+import json
+import os
+import platform as py_platform
+import statistics
+import subprocess
+from time import perf_counter, strftime
+
+from generate_deck import generate_cards
+from headless import ROOT_DIR, HeadlessApp, import_app
+
+DEFAULT_SIZES = (100, 1000, 10000, 100000)
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class BenchmarkRunner:
+    """Запускает сценарии на одном экземпляре приложения и собирает замеры"""
+
+    def __init__(self, app_main, repeat):
+        self.main = app_main
+        self.repeat = repeat
+        self.results = []
+        self.headless = HeadlessApp(app_main)
+        self.clock = self.headless.clock
+        self.pump = self.headless.pump
+        self.wait_background = self.headless.wait_background
+        self.close_popups = self.headless.close_popups
+        self.learn = self.headless.learn
+        self.edit = self.headless.edit
+
+    def measure(self, name, size, fn, setup=None, calls=1):
+        """Замеряет fn repeat раз; при calls > 1 записывается время одного вызова"""
+        timings = []
+        for _ in range(self.repeat):
+            if setup is not None:
+                setup()
+            self.wait_background()
+            started = perf_counter()
+            for _ in range(calls):
+                fn()
+            timings.append((perf_counter() - started) * 1000 / calls)
+        result = {
+            'name': name,
+            'size': size,
+            'runs': len(timings),
+            'min_ms': round(min(timings), 3),
+            'median_ms': round(statistics.median(timings), 3),
+            'mean_ms': round(statistics.fmean(timings), 3),
+        }
+        self.results.append(result)
+        print(f"{name:<28} {size:>7}  median {result['median_ms']:>10.3f} ms  min {result['min_ms']:>10.3f} ms")
+        return result
+
+    def run_size(self, size):
+        main = self.main
+        repository = main.card_repository
+        cards = generate_cards(size)
+
+        # Сохранение: полная перезапись снимка
+        self.measure('save_cards', size, lambda: main.save_cards([dict(card) for card in cards]))
+        self.pump()
+
+        # Загрузка: разбор JSON, двоичная копия снимка и попадание в кэш
+        def cold_json():
+            main.CARDS_BINARY_SNAPSHOT = False
+            repository.invalidate()
+
+        self.measure('load_cards_json', size, main.load_cards, setup=cold_json)
+        main.CARDS_BINARY_SNAPSHOT = True
+        repository.backend._schedule_binary_snapshot()
+        self.measure('load_cards_binary', size, main.load_cards, setup=repository.invalidate)
+        self.measure('load_cards_cached', size, main.load_cards)
+
+        # Список карточек: данные RecycleView и один кадр раскладки
+        def build_list():
+            self.edit._display_cards_list(repository.cards())
+            self.clock.tick()
+
+        self.measure('list_build', size, build_list)
+
+        # Обучение: новая сессия до показа первой карточки и смена карточки
+        def reset_session():
+            self.learn.reset_session()
+            self.main.io_worker.wait(timeout=60)
+            self.clock.tick()
+
+        def cold_scheduler():
+            main.review_scheduler.apply_changes([main.CardChange('reset', None, None)])
+
+        self.measure('reset_session_cold', size, reset_session, setup=cold_scheduler)
+        self.measure('reset_session', size, reset_session)
+        # Смена карточки: ответ "Знаю" и показ следующей. Отвеченные карточки уходят
+        # из очереди, поэтому вызовов не больше, чем карточек на все повторы замера
+        answers = max(1, min(100, size // (2 * self.repeat)))
+        self.measure('answer_card', size, self.learn.on_swipe_right, setup=reset_session, calls=answers)
+
+        # Экспорт и импорт через те же функции, что и кнопки вкладки "Список"
+        export_paths = []
+        self.measure('export', size, lambda: export_paths.append(self.edit._export_desktop(repository.cards())))
+
+        def import_cards():
+            imported = self.edit._read_import_file(export_paths[-1])
+            self.edit._on_import_file_read(imported)
+            self.main.io_worker.wait(timeout=60)
+            self.clock.tick()
+
+        self.measure('import', size, import_cards, setup=self.close_popups)
+        self.close_popups()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark hot paths of the flashcards app')
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='comma separated deck sizes (default: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per measurement (default: %(default)s)')
+    parser.add_argument('--output', default='benchmark_results.json', help='JSON results file (default: %(default)s)')
+    args = parser.parse_args(argv)
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    output = os.path.abspath(args.output)
+
+    app_main = import_app(prefix='cards-bench-')
+    import kivy
+
+    runner = BenchmarkRunner(app_main, args.repeat)
+    for size in sizes:
+        runner.run_size(size)
+
+    report = {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': py_platform.python_version(),
+            'kivy': kivy.__version__,
+            'platform': py_platform.platform(),
+            'storage_backend': app_main.STORAGE_BACKEND,
+            'repeat': args.repeat,
+            'sizes': sizes,
+        },
+        'results': runner.results,
+    }
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f'Results written to {output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Генератор синтетических колод в формате cards.json.
+
+Тексты смешивают кириллицу и латиницу, ответы бывают из нескольких абзацев,
+часть карточек - точные и почти точные дубликаты. Часть карточек может быть
+уже "изученной" (с полями SM-2), чтобы очередь повторения была реалистичной:
+
+    python tools/generate_deck.py --count 100000 --output cards.json
+"""
+import argparse
+import json
+import random
+from time import time as unix_time
+
+CYRILLIC_SYLLABLES = (
+    'ба', 'ве', 'го', 'да', 'же', 'зи', 'ка', 'ло', 'ми', 'но', 'пре', 'ра', 'сто', 'ту', 'фи',
+    'хо', 'це', 'чу', 'ша', 'щи', 'ю', 'я', 'ство', 'ние', 'ость', 'ный', 'ать', 'ить',
+)
+LATIN_SYLLABLES = (
+    'ba', 'con', 'de', 'ex', 'fi', 'gra', 'hu', 'in', 'ka', 'lo', 'man', 'ne', 'or', 'pre',
+    'qui', 're', 'sta', 'tion', 'un', 'ver', 'wo', 'xy', 'ing', 'ment', 'ous', 'ly',
+)
+PUNCTUATION = ('', '', '', ',', ',', '.', ';', ':', ' -')
+
+
+class DeckGenerator:
+    """Генерирует карточки с заданными распределениями длины и языка текста"""
+
+    def __init__(self, seed=0, cyrillic_ratio=0.6, front_words=(1, 6), back_paragraphs=(1, 3),
+                 paragraph_words=(5, 60), duplicate_ratio=0.02, near_duplicate_ratio=0.03,
+                 reviewed_ratio=0.3):
+        self.rng = random.Random(seed)
+        self.cyrillic_ratio = cyrillic_ratio
+        self.front_words = front_words
+        self.back_paragraphs = back_paragraphs
+        self.paragraph_words = paragraph_words
+        self.duplicate_ratio = duplicate_ratio
+        self.near_duplicate_ratio = near_duplicate_ratio
+        self.reviewed_ratio = reviewed_ratio
+
+    def word(self, cyrillic):
+        syllables = CYRILLIC_SYLLABLES if cyrillic else LATIN_SYLLABLES
+        return ''.join(self.rng.choice(syllables) for _ in range(self.rng.randint(1, 4)))
+
+    def words(self, count_range):
+        # Язык выбирается на фразу, отдельные слова другого языка вкрапляются как в реальных конспектах
+        cyrillic = self.rng.random() < self.cyrillic_ratio
+        result = []
+        for _ in range(self.rng.randint(*count_range)):
+            word = self.word(cyrillic if self.rng.random() < 0.9 else not cyrillic)
+            result.append(word + self.rng.choice(PUNCTUATION))
+        return ' '.join(result).rstrip(',;: -')
+
+    def front(self):
+        text = self.words(self.front_words)
+        return text[:1].upper() + text[1:]
+
+    def back(self):
+        paragraphs = [self.words(self.paragraph_words) + '.' for _ in range(self.rng.randint(*self.back_paragraphs))]
+        return '\n\n'.join(paragraphs)
+
+    def near_duplicate(self, text):
+        """Тот же текст с другим регистром, пробелами или опечаткой"""
+        variant = self.rng.randrange(3)
+        if variant == 0:
+            return text.upper() if self.rng.random() < 0.5 else text.lower()
+        if variant == 1:
+            return '  ' + text.replace(' ', '  ', 1) + ' '
+        if len(text) < 2:
+            return text + text
+        position = self.rng.randrange(len(text) - 1)
+        return text[:position] + text[position + 1] + text[position] + text[position + 2:]
+
+    def schedule(self, now):
+        """Поля SM-2 для карточки, которую уже повторяли"""
+        reps = self.rng.randint(1, 8)
+        interval = min(365, int(2.5 ** (reps - 1)))
+        return {
+            'ease': round(self.rng.uniform(1.3, 2.8), 2),
+            'interval': interval,
+            'reps': reps,
+            'due': int(now + self.rng.uniform(-3, interval) * 24 * 60 * 60),
+        }
+
+    def cards(self, count, with_ids=True):
+        now = unix_time()
+        cards = []
+        for i in range(count):
+            roll = self.rng.random()
+            if cards and roll < self.duplicate_ratio:
+                source = self.rng.choice(cards)
+                card = {'front': source['front'], 'back': source['back']}
+            elif cards and roll < self.duplicate_ratio + self.near_duplicate_ratio:
+                source = self.rng.choice(cards)
+                card = {'front': self.near_duplicate(source['front']), 'back': self.back()}
+            else:
+                card = {'front': self.front(), 'back': self.back()}
+            if self.rng.random() < self.reviewed_ratio:
+                card.update(self.schedule(now))
+            if with_ids:
+                card['id'] = i + 1
+            cards.append(card)
+        return cards
+
+
+def generate_cards(count, seed=0, **options):
+    return DeckGenerator(seed=seed, **options).cards(count)
+
+
+def _int_range(value):
+    low, _, high = value.partition(',')
+    return int(low), int(high or low)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate a synthetic deck in the cards.json format')
+    parser.add_argument('--count', type=int, default=1000, help='number of cards (default: %(default)s)')
+    parser.add_argument('--output', default='cards.json', help='output file (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cyrillic-ratio', type=float, default=0.6,
+                        help='share of Cyrillic phrases (default: %(default)s)')
+    parser.add_argument('--front-words', type=_int_range, default=(1, 6), help='min,max words on the front')
+    parser.add_argument('--back-paragraphs', type=_int_range, default=(1, 3), help='min,max paragraphs on the back')
+    parser.add_argument('--paragraph-words', type=_int_range, default=(5, 60), help='min,max words per paragraph')
+    parser.add_argument('--duplicate-ratio', type=float, default=0.02, help='share of exact duplicates')
+    parser.add_argument('--near-duplicate-ratio', type=float, default=0.03,
+                        help='share of fronts differing only in case, spacing or a typo')
+    parser.add_argument('--reviewed-ratio', type=float, default=0.3, help='share of cards with SM-2 fields')
+    parser.add_argument('--no-ids', action='store_true', help='omit ids, like decks from older app versions')
+    parser.add_argument('--compact', action='store_true', help='write without indentation')
+    args = parser.parse_args(argv)
+
+    generator = DeckGenerator(
+        seed=args.seed,
+        cyrillic_ratio=args.cyrillic_ratio,
+        front_words=args.front_words,
+        back_paragraphs=args.back_paragraphs,
+        paragraph_words=args.paragraph_words,
+        duplicate_ratio=args.duplicate_ratio,
+        near_duplicate_ratio=args.near_duplicate_ratio,
+        reviewed_ratio=args.reviewed_ratio,
+    )
+    cards = generator.cards(args.count, with_ids=not args.no_ids)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        # Как и приложение, пишем читаемый JSON с отступами
+        json.dump(cards, f, ensure_ascii=False, indent=None if args.compact else 2)
+    print(f'Wrote {len(cards)} cards to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Общий запуск приложения без экрана для инструментов из tools/.
+
+Колода, журналы и экспорт пишутся во временный каталог, настоящие данные не трогаются.
+"""
+import os
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_app(prefix='cards-tools-'):
+    """Настраивает окружение Kivy, переходит во временный каталог и импортирует main"""
+    os.environ.setdefault('SDL_VIDEODRIVER', 'offscreen')
+    os.environ['KIVY_NO_ARGS'] = '1'
+    os.environ.setdefault('KIVY_NO_CONSOLELOG', '1')
+    # Иначе Clock.tick() досыпает до следующего кадра по maxfps и это попадает в замеры
+    os.environ['KCFG_GRAPHICS_MAXFPS'] = '0'
+    work_dir = tempfile.mkdtemp(prefix=prefix)
+    os.chdir(work_dir)
+    if ROOT_DIR not in sys.path:
+        sys.path.insert(0, ROOT_DIR)
+
+    import logging
+    import main as app_main
+    logging.getLogger().setLevel(logging.WARNING)
+    app_main.Logger.setLevel(logging.WARNING)
+    # Экспорт пишет в ~/Downloads
+    os.environ['HOME'] = work_dir
+    return app_main
+
+
+class HeadlessApp:
+    """Экземпляр CardApp в окне без экрана со всеми построенными вкладками"""
+
+    def __init__(self, app_main):
+        from kivy.base import EventLoop
+        from kivy.clock import Clock
+        from kivy.core.window import Window
+        self.main = app_main
+        self.clock = Clock
+        self.event_loop = EventLoop
+        self.window = Window
+
+        self.app = app_main.CardApp()
+        root = self.app.build()
+        self.app.root = root
+        Window.add_widget(root)
+        self.app.on_start()
+        # Вкладки строятся лениво: открываем все, чтобы дальше мерить только сами операции
+        for tab in list(root.tab_list):
+            root.switch_to(tab)
+            self.pump()
+        self.learn = self.app.learn_content
+        self.edit = self.app.edit_content
+
+    def switch_to(self, content):
+        for tab in self.app.root.tab_list:
+            if tab.content is content:
+                self.app.root.switch_to(tab)
+                self.pump()
+                return
+
+    def wait_background(self):
+        """Дожидается фоновых записей, чтобы они не искажали следующий замер"""
+        self.main.io_worker.wait(timeout=60)
+        thread = getattr(self.main.card_repository.backend, '_binary_thread', None)
+        if thread is not None:
+            thread.join()
+
+    def pump(self, frames=2):
+        for _ in range(frames):
+            self.wait_background()
+            self.clock.tick()
+
+    def close_popups(self):
+        from kivy.uix.popup import Popup
+        for widget in list(self.window.children):
+            if isinstance(widget, Popup):
+                widget.dismiss(animation=False)
+        self.pump(1)
@@ -0,0 +1,192 @@
+"""
+Нагрузочный прогон вкладки обучения.
+
+Поднимает приложение без экрана на синтетической (или заданной) колоде и подает
+тысячи касаний: тап по карточке (переворот), кнопки "Знаю" и "Повторить",
+прокрутка ответа. Для каждого события замеряется время до конца следующего
+кадра; в отчет попадают перцентили по типам событий и пиковый RSS процесса:
+
+    python tools/load_test.py --cards 20000 --events 5000 --output load_test_results.json
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+from time import perf_counter, sleep, strftime
+
+from generate_deck import generate_cards
+from headless import HeadlessApp, import_app
+
+DEFAULT_MIX = 'flip=0.35,know=0.35,repeat=0.15,scroll=0.15'
+PERCENTILES = (50, 90, 95, 99)
+
+
+def peak_rss_mb():
+    # ru_maxrss: килобайты в Linux, байты в macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def percentile(sorted_values, percent):
+    """Перцентиль методом ближайшего ранга"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(percent / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies):
+    values = sorted(latencies)
+    summary = {'count': len(values), 'max_ms': round(values[-1], 3) if values else 0.0}
+    for percent in PERCENTILES:
+        summary[f'p{percent}_ms'] = round(percentile(values, percent), 3)
+    return summary
+
+
+def _parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+class LearningLoadTest:
+    """Подает касания в LearningTab/LearningCard и меряет время обработки"""
+
+    def __init__(self, headless, mix, seed=0, think_ms=0):
+        from kivy.tests.common import UnitTestTouch
+        self.touch_class = UnitTestTouch
+        self.headless = headless
+        self.main = headless.main
+        self.learn = headless.learn
+        self.event_loop = headless.event_loop
+        self.rng = random.Random(seed)
+        self.events = list(mix)
+        self.weights = [mix[name] for name in self.events]
+        self.think_ms = think_ms
+        self.answered = set()
+        self.latencies = {}
+
+    def frame(self):
+        # Кадр целиком: Clock, ввод и отрисовка
+        self.event_loop.idle()
+
+    def tap(self, widget):
+        x, y = widget.to_window(*widget.center)
+        touch = self.touch_class(x, y)
+        touch.touch_down()
+        touch.touch_up()
+
+    def drag(self, widget, distance):
+        x, y = widget.to_window(*widget.center)
+        touch = self.touch_class(x, y)
+        touch.touch_down()
+        steps = 5
+        for step in range(1, steps + 1):
+            touch.touch_move(x, y + distance * step / steps)
+            self.frame()
+        touch.touch_up()
+
+    def restart_session(self):
+        """Все карточки отвечены: возвращаем их в очередь и начинаем сессию заново"""
+        for card_id in self.answered:
+            self.main.review_scheduler.reschedule(card_id, 0)
+        self.answered.clear()
+        self.learn.reset_session()
+        self.main.io_worker.wait(timeout=60)
+
+    def run_event(self, name):
+        card = self.learn.current_card
+        widget = self.learn.current_card_widget
+        if card is None or widget is None or widget.parent is None:
+            name = 'session_restart'
+        started = perf_counter()
+        if name == 'session_restart':
+            self.restart_session()
+        elif name == 'flip':
+            self.tap(widget)
+        elif name == 'know':
+            self.answered.add(card['id'])
+            self.tap(self.learn.know_btn)
+        elif name == 'repeat':
+            self.answered.add(card['id'])
+            self.tap(self.learn.repeat_btn)
+        elif name == 'scroll':
+            if widget.current_side == 'front':
+                widget.flip_card()
+            self.drag(widget, -self.rng.uniform(20, 200))
+        else:
+            raise ValueError(f'Unknown event type: {name}')
+        self.frame()
+        self.latencies.setdefault(name, []).append((perf_counter() - started) * 1000)
+
+    def run(self, count):
+        for _ in range(count):
+            self.run_event(self.rng.choices(self.events, self.weights)[0])
+            if self.think_ms:
+                sleep(self.think_ms / 1000)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Drive the learning tab with simulated touches')
+    parser.add_argument('--cards', type=int, default=10000, help='synthetic deck size (default: %(default)s)')
+    parser.add_argument('--deck', help='use an existing deck file instead of a synthetic one')
+    parser.add_argument('--events', type=int, default=2000, help='number of simulated events (default: %(default)s)')
+    parser.add_argument('--mix', type=_parse_mix, default=_parse_mix(DEFAULT_MIX),
+                        help=f'event weights (default: {DEFAULT_MIX})')
+    parser.add_argument('--think-ms', type=float, default=0, help='pause between events, lets animations run')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='load_test_results.json', help='JSON results file (default: %(default)s)')
+    args = parser.parse_args(argv)
+    output = os.path.abspath(args.output)
+    if args.deck:
+        with open(args.deck, 'r', encoding='utf-8') as f:
+            cards = json.load(f)
+    else:
+        cards = generate_cards(args.cards, seed=args.seed)
+
+    app_main = import_app(prefix='cards-load-')
+    app_main.save_cards(cards)
+    rss_after_load = peak_rss_mb()
+    headless = HeadlessApp(app_main)
+    headless.switch_to(headless.learn)
+    headless.learn.reset_session()
+    headless.pump()
+
+    test = LearningLoadTest(headless, args.mix, seed=args.seed, think_ms=args.think_ms)
+    started = perf_counter()
+    test.run(args.events)
+    elapsed = perf_counter() - started
+    headless.wait_background()
+
+    results = {name: summarize(values) for name, values in sorted(test.latencies.items())}
+    results['all'] = summarize([value for values in test.latencies.values() for value in values])
+    report = {
+        'meta': {
+            'timestamp': strftime('%Y-%m-%dT%H:%M:%S'),
+            'cards': len(cards),
+            'events': args.events,
+            'mix': args.mix,
+            'seed': args.seed,
+            'elapsed_s': round(elapsed, 3),
+        },
+        'peak_rss_mb': {'after_deck_load': round(rss_after_load, 1), 'end': round(peak_rss_mb(), 1)},
+        'latency': results,
+        'transition_stats': headless.learn.transition_stats,
+        'texture_cache': app_main.card_texture_cache.stats(),
+    }
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"{'event':<16} {'count':>6} {'p50':>9} {'p90':>9} {'p95':>9} {'p99':>9} {'max':>9}  (ms)")
+    for name, summary in results.items():
+        print(f"{name:<16} {summary['count']:>6} {summary['p50_ms']:>9.2f} {summary['p90_ms']:>9.2f} "
+              f"{summary['p95_ms']:>9.2f} {summary['p99_ms']:>9.2f} {summary['max_ms']:>9.2f}")
+    print(f"Peak RSS: {report['peak_rss_mb']['end']:.1f} MB; results written to {output}")
+
+
+if __name__ == '__main__':
+    main()